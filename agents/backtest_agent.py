@@ -1,114 +1,425 @@
+import os
+import time
 import yfinance as yf
 import pandas as pd
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Tuple, Dict, Union
 import numpy as np
+# cache=True kernels go to __pycache__ next to this file (or numba's per-user
+# cache dir when that isn't writable), so joblib workers load them instead of
+# re-JITting; set NUMBA_CACHE_DIR in the deployment to put them elsewhere.
+from numba import njit
+from joblib import Parallel, delayed
+
+CACHE_DIR = ".cache"
+DEFAULT_START = "2015-01-01"
+
+CACHE_TTL = 24 * 60 * 60  # seconds before an on-disk price file is refetched
+
+RSI_PERIOD = 14
+BB_WINDOW = 20
+BB_K = 2.0
+WARMUP = max(RSI_PERIOD, BB_WINDOW - 1)  # leading bars without a full set of indicators
+
+BUY, SELL = 0, 1
+_SIDE_NAMES = ("BUY", "SELL")
+
+TRADE_DTYPE = np.dtype([
+    ("bar_idx", np.int64),
+    ("side", np.int8),  # BUY or SELL
+    ("price", np.float64),
+    ("shares", np.int64),
+    ("equity", np.float64),
+])
+
+
+@njit(cache=True, fastmath=True)
+def _simulate_core(close, buy_price_arr, sell_price_arr, buy_sig, sell_sig, initial_cash, pos_size, tc):
+    """Run the holding/flat state machine over precomputed signals.
+
+    `buy_price_arr`/`sell_price_arr` are the close prices with slippage
+    already applied, so the loop only does the cash bookkeeping.
+
+    Returns the equity per bar (plus one trailing slot for the final
+    liquidation) and the executed trades as a TRADE_DTYPE array.
+    """
+    n = close.shape[0]
+    equity_arr = np.empty(n + 1, dtype=np.float64)
+    trades = np.empty(n + 1, dtype=TRADE_DTYPE)
+    t = 0  # at most one trade per bar plus the final liquidation
+
+    cash = initial_cash
+    equity = initial_cash
+    shares = 0
+    holding = 0
+
+    for i in range(n):
+        price = close[i]
+
+        # Track equity daily
+        if holding == 1:
+            equity = shares * price + cash
+        else:
+            equity = cash
+        equity_arr[i] = equity
+
+        # Buy signal
+        if holding == 0 and buy_sig[i]:
+            # Position sizing
+            alloc_cash = cash * pos_size
+            buy_price = buy_price_arr[i]
+            n_shares = int(alloc_cash // buy_price)
+            if n_shares > 0:
+                cost = n_shares * buy_price
+                fee = cost * tc
+                cash -= (cost + fee)
+                shares += n_shares
+                holding = 1
+                trades[t].bar_idx = i
+                trades[t].side = BUY
+                trades[t].price = buy_price
+                trades[t].shares = n_shares
+                trades[t].equity = equity
+                t += 1
+
+        # Sell signal
+        elif holding == 1 and sell_sig[i]:
+            sell_price = sell_price_arr[i]
+            proceeds = shares * sell_price
+            fee = proceeds * tc
+            cash += (proceeds - fee)
+            trades[t].bar_idx = i
+            trades[t].side = SELL
+            trades[t].price = sell_price
+            trades[t].shares = shares
+            trades[t].equity = equity
+            t += 1
+            shares = 0
+            holding = 0
+
+    # Final equity update if still holding
+    if holding == 1 and shares > 0:
+        final_price = sell_price_arr[n - 1]
+        proceeds = shares * final_price
+        fee = proceeds * tc
+        cash += (proceeds - fee)
+        trades[t].bar_idx = n - 1
+        trades[t].side = SELL
+        trades[t].price = final_price
+        trades[t].shares = shares
+        trades[t].equity = cash
+        t += 1
+
+    # Final equity curve update
+    equity_arr[n] = cash
+
+    return equity_arr, trades[:t]
+
+
+@njit(cache=True)
+def _wilder_rsi(close: np.ndarray, period: int) -> np.ndarray:
+    """RSI with Wilder's smoothing; the first `period` values, and bars with no price movement, are NaN."""
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+
+    # Seed with the simple mean of the first `period` deltas
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    avg_gain /= period
+    avg_loss /= period
+
+    for i in range(period, n):
+        if i > period:
+            delta = close[i] - close[i - 1]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        if avg_loss == 0.0:
+            # Flat prices have no RSI (0/0); leave NaN so they never trigger a signal
+            if avg_gain > 0.0:
+                out[i] = 100.0
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+
+@njit(cache=True)
+def _bb(close: np.ndarray, w: int = 20, k: float = 2.0):
+    """Moving average and Bollinger bands from one running sum/sum-of-squares pass.
+
+    Uses the sample standard deviation, like pandas' rolling().std().
+    The first `w - 1` values are NaN.
+    """
+    n = close.shape[0]
+    ma = np.full(n, np.nan)
+    upper = np.full(n, np.nan)
+    lower = np.full(n, np.nan)
+
+    s = 0.0
+    ss = 0.0
+    for i in range(n):
+        x = close[i]
+        s += x
+        ss += x * x
+        if i >= w:
+            x_old = close[i - w]
+            s -= x_old
+            ss -= x_old * x_old
+        if i >= w - 1:
+            mean = s / w
+            var = (ss - s * mean) / (w - 1)
+            sd = np.sqrt(var) if var > 0.0 else 0.0
+            ma[i] = mean
+            upper[i] = mean + k * sd
+            lower[i] = mean - k * sd
+    return ma, upper, lower
+
+
+@njit(cache=True)
+def _ret_stats(eq: np.ndarray):
+    """Mean and std of bar-to-bar returns plus the std of the negative ones, in one pass.
+
+    Uses Welford's update for both accumulators; the stds are population
+    stds (ddof=0), matching np.std.
+    """
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    down_n = 0
+    down_mean = 0.0
+    down_m2 = 0.0
+    for i in range(1, eq.shape[0]):
+        r = (eq[i] - eq[i - 1]) / eq[i - 1]
+        n += 1
+        d = r - mean
+        mean += d / n
+        m2 += d * (r - mean)
+        if r < 0:
+            down_n += 1
+            d = r - down_mean
+            down_mean += d / down_n
+            down_m2 += d * (r - down_mean)
+
+    std = np.sqrt(m2 / n) if n > 0 else 0.0
+    down_std = np.sqrt(down_m2 / down_n) if down_n > 0 else 0.0
+    return mean, std, down_std
+
+
+# Compile once at import so the first backtest doesn't pay for it
+_simulate_core(np.ones(2), np.ones(2), np.ones(2), np.zeros(2, dtype=np.bool_), np.zeros(2, dtype=np.bool_), 1.0, 1.0, 0.0)
+_wilder_rsi(np.ones(2), 1)
+_bb(np.ones(2), 2, 2.0)
+_ret_stats(np.ones(2))
+
+
+def _add_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    # NaNs in the raw prices would poison the running sums, so drop them first
+    if df.isna().to_numpy().any():
+        df = df.dropna()
+
+    close = df["Close"].to_numpy(dtype=np.float64)
+    df["RSI"] = _wilder_rsi(close, RSI_PERIOD)
+    df["MA"], df["UpperBB"], df["LowerBB"] = _bb(close, BB_WINDOW, BB_K)
+
+    # Indicator NaNs only come from the warmup bars, so slicing them off is enough
+    df = df.iloc[WARMUP:]
+    if df.isna().to_numpy().any():
+        df = df.dropna()
+    return df
+
+
+def _cache_path(symbol: str, start: str, end: str, interval: str) -> str:
+    return os.path.join(CACHE_DIR, f"{symbol}_{start}_{end}_{interval}.parquet")
+
+
+def _is_fresh(path: str) -> bool:
+    return os.path.exists(path) and time.time() - os.path.getmtime(path) < CACHE_TTL
+
+
+def _write_cache(df: pd.DataFrame, path: str):
+    # The disk cache is only an optimisation: a read-only cwd, a full disk or a
+    # missing parquet engine must not fail a backtest whose data downloaded fine
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(path)
+    except (OSError, ImportError) as e:
+        print(f"⚠️ Could not cache prices at {path}: {e}")
+        # Don't leave a partial file behind for _is_fresh to pick up
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=64)
+def _cached_download(symbol: str, start: str, end: str, interval: str) -> pd.DataFrame:
+    """Daily prices with indicators, cached in memory and as parquet under CACHE_DIR."""
+    cache_path = _cache_path(symbol, start, end, interval)
+    if _is_fresh(cache_path):
+        return pd.read_parquet(cache_path)
+
+    print(f"📈 Downloading data for {symbol}")
+    df = yf.download(symbol, start=start, end=end, interval=interval)
+
+    if df.empty:
+        raise ValueError(f"No data found for {symbol}")
+
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.xs(symbol, axis=1, level=1)
+
+    df = _add_indicators(df)
+    _write_cache(df, cache_path)
+    return df
+
+
+def prefetch_prices(symbols: List[str], start: str = DEFAULT_START, end: str = None, interval: str = "1d") -> Dict[str, pd.DataFrame]:
+    """Download every uncached symbol in one batched request and return their price frames.
+
+    The frames carry the indicator columns and are written to the disk
+    cache, so they can be passed to BacktestAgent as `price_df` or picked
+    up later by fetch_data. Symbols Yahoo returns nothing for are left
+    out of the result.
+    """
+    end = end or datetime.now().strftime("%Y-%m-%d")
+    symbols = list(dict.fromkeys(symbols))
+    missing = [s for s in symbols if not _is_fresh(_cache_path(s, start, end, interval))]
+    downloaded = {}
+
+    if missing:
+        print(f"📈 Downloading data for {', '.join(missing)}")
+        batch = yf.download(missing, start=start, end=end, interval=interval, group_by="ticker", threads=True)
+        for symbol in missing:
+            if isinstance(batch.columns, pd.MultiIndex):
+                if symbol not in batch.columns.get_level_values(0):
+                    continue
+                df = batch[symbol]
+            else:
+                df = batch
+            df = df.dropna(how="all")
+            if df.empty:
+                continue
+            df = _add_indicators(df.copy())
+            _write_cache(df, _cache_path(symbol, start, end, interval))
+            downloaded[symbol] = df
+
+    prices = {}
+    for symbol in symbols:
+        if symbol in downloaded:
+            # Used directly, so a failed cache write doesn't lose the download
+            prices[symbol] = downloaded[symbol]
+        elif _is_fresh(_cache_path(symbol, start, end, interval)):
+            prices[symbol] = _cached_download(symbol, start, end, interval)
+    return prices
+
 
 class BacktestAgent:
-    def __init__(self, strategy_mcp, initial_cash: float = 100000, position_size: float = 1.0, slippage: float = 0.001, transaction_cost: float = 0.0005):
+    def __init__(self, strategy_mcp, initial_cash: float = 100000, position_size: float = 1.0, slippage: float = 0.001, transaction_cost: float = 0.0005, price_df: pd.DataFrame = None):
         self.symbol = strategy_mcp.symbol
-        self.start_date = "2015-01-01"
+        self.start_date = DEFAULT_START
         self.end_date = datetime.now().strftime("%Y-%m-%d")
         self.initial_cash = initial_cash
         self.position_size = position_size  # Fraction of cash to use per trade (1.0 = all-in)
         self.slippage = slippage            # Slippage as a fraction of price (e.g., 0.001 = 0.1%)
         self.transaction_cost = transaction_cost  # Per trade as a fraction of notional
+        self.price_df = price_df  # Preloaded prices, e.g. from prefetch_prices()
 
     def fetch_data(self) -> pd.DataFrame:
-        print(f"📈 Downloading data for {self.symbol}")
-        df = yf.download(self.symbol, start=self.start_date, end=self.end_date, interval="1d")
-
-        if df.empty:
-            raise ValueError(f"No data found for {self.symbol}")
-
-        if isinstance(df.columns, pd.MultiIndex):
-            df = df.xs(self.symbol, axis=1, level=1)
-
-        df.dropna(inplace=True)
-
-        df["RSI"] = self.compute_rsi(df["Close"])
-        df["MA"] = df["Close"].rolling(window=20).mean()
-        std = df["Close"].rolling(window=20).std()
-        df["UpperBB"] = df["MA"] + 2 * std
-        df["LowerBB"] = df["MA"] - 2 * std
+        if self.price_df is not None:
+            if "RSI" in self.price_df.columns:
+                return self.price_df.copy()
+            return _add_indicators(self.price_df.copy())
 
-        return df.dropna()
+        # Copy so callers can't mutate the shared cached frame
+        return _cached_download(self.symbol, self.start_date, self.end_date, "1d").copy()
 
     @staticmethod
     def compute_rsi(series: pd.Series, period: int = 14) -> pd.Series:
-        delta = series.diff()
-        gain = delta.clip(lower=0)
-        loss = -delta.clip(upper=0)
-        avg_gain = gain.rolling(window=period).mean()
-        avg_loss = loss.rolling(window=period).mean()
-        rs = avg_gain / avg_loss
-        return 100 - (100 / (1 + rs))
+        return pd.Series(_wilder_rsi(series.to_numpy(dtype=np.float64), period), index=series.index)
 
     def simulate(self) -> Dict:
         print("🚀 Running backtest simulation...")
+        return self._simulate_arrays(self._fetch_arrays())
+
+    def simulate_grid(self, param_grid: List[Dict], n_jobs: int = -1) -> List[Dict]:
+        """Backtest every parameter set in `param_grid` in parallel over the same prices.
+
+        Each dict may set rsi_entry, rsi_exit, bb_mult, position_size,
+        slippage and transaction_cost; anything missing uses the agent's
+        defaults. Results are returned in the order of `param_grid`.
+        """
+        print(f"🚀 Running backtest grid of {len(param_grid)} configurations...")
+        arrs = self._fetch_arrays()
+        return Parallel(n_jobs=n_jobs, backend="loky")(
+            delayed(self._simulate_arrays)(arrs, **params) for params in param_grid
+        )
+
+    def _fetch_arrays(self) -> Dict[str, np.ndarray]:
         df = self.fetch_data()
+        ma = df["MA"].to_numpy(dtype=np.float64)
+        return {
+            "close": df["Close"].to_numpy(dtype=np.float64),
+            "rsi": df["RSI"].to_numpy(dtype=np.float64),
+            "ma": ma,
+            "lower": df["LowerBB"].to_numpy(dtype=np.float64),
+            "std": (df["UpperBB"].to_numpy(dtype=np.float64) - ma) / BB_K,
+            # Formatted once for the whole index rather than per bar
+            "dates": df.index.strftime('%Y-%m-%d').to_numpy(),
+        }
 
-        cash = self.initial_cash
-        equity = self.initial_cash
-        shares = 0
-        holding = False
-        entry_price = 0
-        trades: List[Tuple[str, str, float, int, float]] = []  # (date, side, price, shares, equity)
-        equity_curve: List[Tuple[str, float]] = []
-
-        for idx, row in df.iterrows():
-            date = idx.strftime('%Y-%m-%d')
-            rsi = float(row["RSI"])
-            close = float(row["Close"])
-            lower_bb = float(row["LowerBB"])
-            ma = float(row["MA"])
-
-            # Track equity daily
-            if holding:
-                equity = shares * close + cash
-            else:
-                equity = cash
-            equity_curve.append((date, equity))
-
-            # Buy signal
-            if not holding and rsi < 30 and close < lower_bb:
-                # Position sizing
-                alloc_cash = cash * self.position_size
-                buy_price = close * (1 + self.slippage)
-                n_shares = int(alloc_cash // buy_price)
-                if n_shares > 0:
-                    cost = n_shares * buy_price
-                    fee = cost * self.transaction_cost
-                    cash -= (cost + fee)
-                    shares += n_shares
-                    holding = True
-                    entry_price = buy_price
-                    trades.append((date, "BUY", buy_price, n_shares, equity))
-
-            # Sell signal
-            elif holding and (rsi > 70 or close > ma):
-                sell_price = close * (1 - self.slippage)
-                proceeds = shares * sell_price
-                fee = proceeds * self.transaction_cost
-                cash += (proceeds - fee)
-                trades.append((date, "SELL", sell_price, shares, equity))
-                shares = 0
-                holding = False
-                entry_price = 0
-
-        # Final equity update if still holding
-        if holding and shares > 0:
-            final_price = df.iloc[-1]["Close"] * (1 - self.slippage)
-            proceeds = shares * final_price
-            fee = proceeds * self.transaction_cost
-            cash += (proceeds - fee)
-            trades.append((df.index[-1].strftime('%Y-%m-%d'), "SELL", final_price, shares, cash))
-            shares = 0
-            holding = False
+    def _simulate_arrays(
+        self,
+        arrs: Dict[str, np.ndarray],
+        rsi_entry: float = 30,
+        rsi_exit: float = 70,
+        bb_mult: float = BB_K,
+        position_size: float = None,
+        slippage: float = None,
+        transaction_cost: float = None
+    ) -> Dict:
+        position_size = self.position_size if position_size is None else position_size
+        slippage = self.slippage if slippage is None else slippage
+        transaction_cost = self.transaction_cost if transaction_cost is None else transaction_cost
+
+        close_arr = arrs["close"]
+        rsi_arr = arrs["rsi"]
+        ma_arr = arrs["ma"]
+        lb_arr = arrs["lower"] if bb_mult == BB_K else ma_arr - bb_mult * arrs["std"]
+        dates = arrs["dates"]
+
+        # Entry/exit signals for every bar, computed up front
+        buy_sig = (rsi_arr < rsi_entry) & (close_arr < lb_arr)
+        sell_sig = (rsi_arr > rsi_exit) | (close_arr > ma_arr)
 
-        # Final equity curve update
-        equity = cash
-        equity_curve.append((df.index[-1].strftime('%Y-%m-%d'), equity))
+        # Fill prices with slippage for every bar in one pass each
+        buy_price_arr = close_arr * (1.0 + slippage)
+        sell_price_arr = close_arr * (1.0 - slippage)
+
+        equity_arr, trade_arr = _simulate_core(
+            close_arr, buy_price_arr, sell_price_arr, buy_sig, sell_sig,
+            float(self.initial_cash), float(position_size), float(transaction_cost)
+        )
+
+        # The kernel only records bar indices; look up date strings for the traded bars in one gather
+        # and convert to the (date, side, price, shares, equity) tuples the results dict exposes
+        trade_dates = dates[trade_arr["bar_idx"]].tolist()
+        trade_sides = [_SIDE_NAMES[side] for side in trade_arr["side"].tolist()]
+        trades: List[Tuple[str, str, float, int, float]] = list(zip(
+            trade_dates,
+            trade_sides,
+            trade_arr["price"].tolist(),
+            trade_arr["shares"].tolist(),
+            trade_arr["equity"].tolist()
+        ))
 
         # Calculate trade returns
         trade_returns = []
@@ -120,37 +431,30 @@ class BacktestAgent:
                 trade_returns.append(ret)
 
         # Metrics
-        profits = [r * self.position_size * self.initial_cash for r in trade_returns]
+        profits = [r * position_size * self.initial_cash for r in trade_returns]
         num_wins = sum(1 for r in trade_returns if r > 0)
         hit_ratio = round((num_wins / len(trade_returns)) * 100, 2) if trade_returns else 0.0
 
         # Max Drawdown
-        eq_vals = [e[1] for e in equity_curve]
-        roll_max = np.maximum.accumulate(eq_vals)
-        drawdowns = (eq_vals - roll_max) / roll_max
-        max_drawdown = round(drawdowns.min() * 100, 2) if len(drawdowns) > 0 else 0.0
+        roll_max = np.maximum.accumulate(equity_arr)
+        drawdowns = equity_arr / roll_max - 1
+        max_drawdown = round(drawdowns.min() * 100, 2)
 
         # CAGR
-        if len(equity_curve) > 1:
-            start_val = equity_curve[0][1]
-            end_val = equity_curve[-1][1]
-            days = (pd.to_datetime(equity_curve[-1][0]) - pd.to_datetime(equity_curve[0][0])).days
-            years = days / 365.25
-            cagr = round(((end_val / start_val) ** (1 / years) - 1) * 100, 2) if years > 0 else 0.0
-        else:
-            cagr = 0.0
+        days = (pd.to_datetime(dates[-1]) - pd.to_datetime(dates[0])).days
+        years = days / 365.25
+        cagr = round(((equity_arr[-1] / equity_arr[0]) ** (1 / years) - 1) * 100, 2) if years > 0 else 0.0
 
         # Sharpe & Sortino
-        returns = np.diff(eq_vals) / eq_vals[:-1] if len(eq_vals) > 1 else np.array([0])
-        mean_return = np.mean(returns)
-        std_return = np.std(returns)
+        mean_return, std_return, std_downside = _ret_stats(equity_arr)
         sharpe_ratio = round(mean_return / std_return * np.sqrt(252), 4) if std_return > 0 else 0.0
-        downside_returns = returns[returns < 0]
-        std_downside = np.std(downside_returns) if len(downside_returns) > 0 else 0.0
         sortino_ratio = round(mean_return / std_downside * np.sqrt(252), 4) if std_downside > 0 else 0.0
 
         avg_return = round(np.mean(profits), 4) if profits else 0.0
 
+        # The trailing equity slot is the post-liquidation value on the last bar
+        equity_curve: List[Tuple[str, float]] = list(zip(np.append(dates, dates[-1]).tolist(), equity_arr.tolist()))
+
         return {
             "symbol": self.symbol,
             "total_trades": len(trade_returns),
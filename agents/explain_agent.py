@@ -1,10 +1,17 @@
 import os
+import re
+import asyncio
+import threading
+from typing import List, Tuple
 from dotenv import load_dotenv
 import google.generativeai as genai
 from mcp.schema import StrategyMCP
 
 load_dotenv()
 
+BATCH_DELIMITER = "---STRATEGY {}---"
+_BATCH_SPLIT = re.compile(r"^\s*-{3}STRATEGY (\d+)-{3}\s*$", re.MULTILINE)
+
 class ExplainabilityAgent:
     def __init__(self):
         api_key = os.getenv("GEMINI_API_KEY")
@@ -14,17 +21,67 @@ class ExplainabilityAgent:
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel("gemini-1.5-flash")
 
-    def explain(
+    async def explain(
         self,
         strategy: StrategyMCP,
         backtest_results: dict,
         tone: str = "simple",  # "simple", "technical", "quant"
         output_format: str = "markdown"  # "markdown", "latex", "plain"
     ) -> str:
-        summary = self.sanitize_results(backtest_results)
-        risks = self.detect_risks(backtest_results)
-        overfit_flag = self.detect_overfit(backtest_results)
+        prompt = (
+            f"{self.instructions(tone, output_format)}"
+            f"Analyze and explain the results of the following backtest.\n\n"
+            f"{self.strategy_section(strategy, backtest_results)}"
+            "💬 Provide an explanation of the strategy performance, highlighting strengths, weaknesses, and any signs of overfitting or risk."
+        )
+
+        response = await self.model.generate_content_async(prompt)
+        return response.text.strip()
+
+    async def explain_batch(
+        self,
+        items: List[Tuple[StrategyMCP, dict]],
+        tone: str = "simple",
+        output_format: str = "markdown"
+    ) -> List[str]:
+        """Explain several backtests with a single Gemini request.
+
+        Each strategy is sent under a ---STRATEGY k--- delimiter and the
+        model is asked to answer under the same delimiters. If the reply
+        can't be split back into one explanation per strategy, falls back
+        to one explain() call per strategy.
+        """
+        if not items:
+            return []
+        if len(items) == 1:
+            return [await self.explain(items[0][0], items[0][1], tone, output_format)]
+
+        sections = "".join(
+            f"{BATCH_DELIMITER.format(k)}\n{self.strategy_section(strategy, results)}"
+            for k, (strategy, results) in enumerate(items, start=1)
+        )
+        prompt = (
+            f"{self.instructions(tone, output_format)}"
+            f"Analyze and explain the results of each of the following {len(items)} backtests.\n\n"
+            f"{sections}"
+            "💬 For each strategy, provide an explanation of the strategy performance, highlighting strengths, "
+            "weaknesses, and any signs of overfitting or risk. Start each explanation with its delimiter line "
+            f"exactly as given (e.g. {BATCH_DELIMITER.format(1)}) and keep the strategies in the same order."
+        )
 
+        response = await self.model.generate_content_async(prompt)
+        parts = _BATCH_SPLIT.split(response.text)
+        # split() yields [preamble, k1, text1, k2, text2, ...]
+        explanations = {int(k): text.strip() for k, text in zip(parts[1::2], parts[2::2])}
+        if sorted(explanations) != list(range(1, len(items) + 1)):
+            print("⚠️ Batched explanation could not be split per strategy, explaining individually.")
+            return list(await asyncio.gather(*(
+                self.explain(strategy, results, tone, output_format) for strategy, results in items
+            )))
+        return [explanations[k] for k in range(1, len(items) + 1)]
+
+    @staticmethod
+    def instructions(tone: str, output_format: str) -> str:
         tone_instructions = {
             "simple": "Explain in clear, everyday language suitable for a non-expert.",
             "technical": "Use technical finance language suitable for an experienced trader.",
@@ -35,11 +92,17 @@ class ExplainabilityAgent:
             "latex": "Format your answer in LaTeX (enclose equations in $$).",
             "plain": "Respond in plain text."
         }
-
-        prompt = (
+        return (
             f"You are a financial trading assistant. {tone_instructions.get(tone, tone_instructions['simple'])} "
             f"{format_instructions.get(output_format, format_instructions['markdown'])}\n\n"
-            f"Analyze and explain the results of the following backtest.\n\n"
+        )
+
+    def strategy_section(self, strategy: StrategyMCP, backtest_results: dict) -> str:
+        summary = self.sanitize_results(backtest_results)
+        risks = self.detect_risks(backtest_results)
+        overfit_flag = self.detect_overfit(backtest_results)
+
+        return (
             f"📌 **Strategy Name:** {strategy.strategy_name}\n"
             f"📘 **Description:** {getattr(strategy, 'description', 'N/A')}\n"
             f"📊 **Assets:** {strategy.symbol}\n"
@@ -57,12 +120,8 @@ class ExplainabilityAgent:
             f"### Risks & Failure Modes\n"
             f"{risks}\n\n"
             f"{overfit_flag}\n"
-            "💬 Provide an explanation of the strategy performance, highlighting strengths, weaknesses, and any signs of overfitting or risk."
         )
 
-        response = self.model.generate_content(prompt)
-        return response.text.strip()
-
     def sanitize_results(self, results):
         sanitized = {
             "avg_return": round(float(results.get("average_return", 0.0)), 3),
@@ -95,3 +154,18 @@ class ExplainabilityAgent:
         if sharpe > 2 and trades < 10:
             return "⚠️ **Potential Overfitting:** High Sharpe Ratio with very few trades may indicate overfitting."
         return ""
+
+
+_explain_agent = None
+_explain_agent_lock = threading.Lock()
+
+
+def get_explain_agent() -> ExplainabilityAgent:
+    """Shared agent, so the Gemini client is configured once per process."""
+    global _explain_agent
+    # Double-checked under a lock: lru_cache would let concurrent first calls each build an agent
+    if _explain_agent is None:
+        with _explain_agent_lock:
+            if _explain_agent is None:
+                _explain_agent = ExplainabilityAgent()
+    return _explain_agent
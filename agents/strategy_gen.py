@@ -2,6 +2,8 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import json
+import threading
+import orjson
 from mcp.schema import StrategyMCP
 from google.generativeai import configure, GenerativeModel
 from dotenv import load_dotenv
@@ -52,36 +54,50 @@ class StrategyGenAgent:
             },
             "timeframe": "string (e.g., 1d, Daily)"
         }
+        # Serialized once; the schema is baked into the prompt templates below
+        self._schema_json = json.dumps(self.system_prompt, indent=2)
+        self._plan_prompt_tmpl = (
+            "Given the following user request, write a detailed trading strategy plan in plain English. "
+            "Do not use JSON or code blocks. Be as clear and structured as possible.\n\n"
+            "User request: %s"
+        )
+        self._json_prompt_tmpl = (
+            "Given this trading strategy plan:\n\n"
+            "%s\n\n"
+            "Convert it into a JSON object matching this schema:\n" + self._schema_json.replace("%", "%%") + "\n"
+            "Respond ONLY with a JSON code block."
+        )
+        self._invalid_json_prompt = (
+            "The previous output was not valid JSON or did not match the schema. "
+            "Please try again. Here is the schema:\n" + self._schema_json + "\n"
+            "Respond ONLY with a JSON code block."
+        )
+        self._missing_fields_prompt_tmpl = (
+            "The previous output was missing required fields: %s. "
+            "Please correct and output valid JSON matching this schema:\n" + self._schema_json.replace("%", "%%") + "\n"
+            "Respond ONLY with a JSON code block."
+        )
 
-    def generate_strategy(self, prompt: str, max_retries: int = 2) -> StrategyMCP:
+    async def generate_strategy(self, prompt: str, max_retries: int = 2) -> StrategyMCP:
         # Stage 1: Generate a text-based plan
-        plan_prompt = (
-            f"Given the following user request, write a detailed trading strategy plan in plain English. "
-            f"Do not use JSON or code blocks. Be as clear and structured as possible.\n\n"
-            f"User request: {prompt}"
-        )
+        plan_prompt = self._plan_prompt_tmpl % prompt
         print("📤 Prompting Gemini for plan...")
-        plan_response = self.model.generate_content(plan_prompt)
+        plan_response = await self.model.generate_content_async(plan_prompt)
         plan_text = plan_response.text.strip()
 
         # Stage 2: Generate structured JSON from the plan
-        json_prompt = (
-            f"Given this trading strategy plan:\n\n"
-            f"{plan_text}\n\n"
-            f"Convert it into a JSON object matching this schema:\n{json.dumps(self.system_prompt, indent=2)}\n"
-            f"Respond ONLY with a JSON code block."
-        )
+        json_prompt = self._json_prompt_tmpl % plan_text
 
         locked_symbol = None  # <-- lock the symbol after first parse
 
         for attempt in range(max_retries + 1):
             print(f"📤 Prompting Gemini for structured JSON (attempt {attempt+1})...")
-            response = self.model.generate_content(json_prompt)
+            response = await self.model.generate_content_async(json_prompt)
             raw_output = response.text.strip()
 
             try:
                 json_str = self.extract_json_from_code_block(raw_output)
-                parsed = json.loads(json_str)
+                parsed = orjson.loads(json_str)
                 # Lock the symbol on first parse, always enforce after
                 if locked_symbol is None:
                     locked_symbol = parsed.get("symbol", "AAPL")
@@ -92,11 +108,7 @@ class StrategyGenAgent:
                 if attempt == max_retries:
                     raise ValueError("Failed to get valid JSON after retries.")
                 # Retry with a correction prompt
-                json_prompt = (
-                    f"The previous output was not valid JSON or did not match the schema. "
-                    f"Please try again. Here is the schema:\n{json.dumps(self.system_prompt, indent=2)}\n"
-                    f"Respond ONLY with a JSON code block."
-                )
+                json_prompt = self._invalid_json_prompt
                 continue
 
             try:
@@ -107,11 +119,7 @@ class StrategyGenAgent:
                     raise ValueError("Failed to validate strategy after retries.")
                 # Retry with a correction prompt
                 missing_fields = self.get_missing_fields(parsed)
-                json_prompt = (
-                    f"The previous output was missing required fields: {missing_fields}. "
-                    f"Please correct and output valid JSON matching this schema:\n{json.dumps(self.system_prompt, indent=2)}\n"
-                    f"Respond ONLY with a JSON code block."
-                )
+                json_prompt = self._missing_fields_prompt_tmpl % (missing_fields,)
         raise ValueError("Failed to generate a valid strategy after retries.")
 
     @staticmethod
@@ -131,3 +139,17 @@ class StrategyGenAgent:
         ]
         return [field for field in required if field not in parsed]
 
+
+_strategy_gen_agent = None
+_strategy_gen_agent_lock = threading.Lock()
+
+
+def get_strategy_gen_agent() -> StrategyGenAgent:
+    """Shared agent, so the Gemini client is configured once per process."""
+    global _strategy_gen_agent
+    # Double-checked under a lock: lru_cache would let concurrent first calls each build an agent
+    if _strategy_gen_agent is None:
+        with _strategy_gen_agent_lock:
+            if _strategy_gen_agent is None:
+                _strategy_gen_agent = StrategyGenAgent()
+    return _strategy_gen_agent
@@ -1,13 +1,15 @@
+import asyncio
 import time
+from typing import List, Optional, Tuple
 import pandas as pd
 from tabulate import tabulate
 from dotenv import load_dotenv
 
-from agents.strategy_gen import StrategyGenAgent
-from agents.backtest_agent import BacktestAgent
-from agents.explain_agent import ExplainabilityAgent
+from agents.strategy_gen import get_strategy_gen_agent
+from agents.backtest_agent import BacktestAgent, prefetch_prices
+from agents.explain_agent import get_explain_agent
 from mcp.schema import StrategyMCP
-from metrics import StrategyRunMetrics  # 🧪 Metrics integration
+from metrics import StrategyRunMetrics, Stage  # 🧪 Metrics integration
 
 load_dotenv()
 
@@ -17,54 +19,38 @@ PROMPTS = [
     "Propose a breakout trading strategy using ATR and Donchian Channels for the ETF IWM, which tracks small-cap U.S. stocks"
 ]
 
-def run_single_pipeline(prompt: str, idx: int, verbose: bool = True) -> dict:
+async def generate_strategy(prompt: str, idx: int, verbose: bool = True) -> Tuple[StrategyRunMetrics, Optional[StrategyMCP]]:
     metrics = StrategyRunMetrics(prompt)  # 🧪 Initialize metrics
 
     print(f"\n🧠 [Strategy {idx}] Prompt: {prompt}")
     try:
-        # Strategy generation
-        strat_agent = StrategyGenAgent()
-        mcp: StrategyMCP = strat_agent.generate_strategy(prompt=prompt)
-        metrics.mark("strategy_gen")
+        strat_agent = get_strategy_gen_agent()
+        mcp: StrategyMCP = await strat_agent.generate_strategy(prompt=prompt)
+        metrics.mark(Stage.STRATEGY_GEN)
         if verbose: print("✅ Strategy generated.")
+        return metrics, mcp
 
-        # Backtest
-        bt_agent = BacktestAgent(mcp)
-        results = bt_agent.simulate()
-        metrics.mark("backtest")
-        if verbose: print("📊 Backtest complete.")
-
-        # Explanation
-        ex_agent = ExplainabilityAgent()
-        explanation = ex_agent.explain(mcp, results)
-        metrics.mark("explain")
-        if verbose: print("📝 Explanation generated.")
-
-        # Complete metrics tracking
-        metrics.complete(
-            sharpe=results.get("sharpe_ratio", 0),
-            win_rate=results.get("win_rate", 0),
-            avg_return=results.get("average_return", 0)
-        )
-
+    except Exception as e:
+        metrics.fail(e)
         metrics.print_summary()
+        print(f"❌ Error running strategy {idx}: {e}")
+        return metrics, None
 
-        return {
-            "Prompt": prompt,
-            "Strategy Name": mcp.strategy_name,
-            "Symbol": results.get("symbol", "N/A"),
-            "Sharpe Ratio": round(results.get("sharpe_ratio", 0), 3),
-            "Sortino Ratio": round(results.get("sortino_ratio", 0), 3),
-            "Avg Return": round(results.get("average_return", 0), 3),
-            "CAGR (%)": round(results.get("cagr", 0), 2),
-            "Max Drawdown (%)": round(results.get("max_drawdown", 0), 2),
-            "Hit Ratio (%)": round(results.get("hit_ratio", 0), 2),
-            "Win Rate (%)": round(results.get("win_rate", 0), 2),
-            "Total Trades": results.get("total_trades", 0),
-            "Equity Curve": results.get("equity_curve", [])[:10],
-            "Explanation": explanation,
-            "Runtime (s)": round(time.time() - metrics.start_time, 2)
-        }
+
+async def run_backtest(
+    idx: int,
+    metrics: StrategyRunMetrics,
+    mcp: StrategyMCP,
+    price_df: Optional[pd.DataFrame] = None,
+    verbose: bool = True
+) -> Optional[dict]:
+    try:
+        bt_agent = BacktestAgent(mcp, price_df=price_df)
+        # The backtest is CPU-bound, keep it off the event loop
+        results = await asyncio.get_running_loop().run_in_executor(None, bt_agent.simulate)
+        metrics.mark(Stage.BACKTEST)
+        if verbose: print("📊 Backtest complete.")
+        return results
 
     except Exception as e:
         metrics.fail(e)
@@ -73,14 +59,88 @@ def run_single_pipeline(prompt: str, idx: int, verbose: bool = True) -> dict:
         return None
 
 
-def main():
+def summarize_run(prompt: str, metrics: StrategyRunMetrics, mcp: StrategyMCP, results: dict, explanation: str) -> dict:
+    # Complete metrics tracking
+    metrics.complete(
+        sharpe=results.get("sharpe_ratio", 0),
+        win_rate=results.get("win_rate", 0),
+        avg_return=results.get("average_return", 0)
+    )
+
+    metrics.print_summary()
+
+    return {
+        "Prompt": prompt,
+        "Strategy Name": mcp.strategy_name,
+        "Symbol": results.get("symbol", "N/A"),
+        "Sharpe Ratio": round(results.get("sharpe_ratio", 0), 3),
+        "Sortino Ratio": round(results.get("sortino_ratio", 0), 3),
+        "Avg Return": round(results.get("average_return", 0), 3),
+        "CAGR (%)": round(results.get("cagr", 0), 2),
+        "Max Drawdown (%)": round(results.get("max_drawdown", 0), 2),
+        "Hit Ratio (%)": round(results.get("hit_ratio", 0), 2),
+        "Win Rate (%)": round(results.get("win_rate", 0), 2),
+        "Total Trades": results.get("total_trades", 0),
+        "Equity Curve": results.get("equity_curve", [])[:10],
+        "Explanation": explanation,
+        "Runtime (s)": round(metrics.elapsed(), 2)
+    }
+
+
+async def run_all_pipelines(verbose: bool = True) -> List[dict]:
+    # Gemini calls for every prompt are in flight at the same time
+    generated = await asyncio.gather(*(generate_strategy(prompt, idx, verbose) for idx, prompt in enumerate(PROMPTS)))
+    strategies = [
+        (idx, prompt, metrics, mcp)
+        for idx, (prompt, (metrics, mcp)) in enumerate(zip(PROMPTS, generated))
+        if mcp is not None
+    ]
+
+    # One batched download for every symbol the strategies picked
+    try:
+        prices = await asyncio.get_running_loop().run_in_executor(
+            None, prefetch_prices, [mcp.symbol for _, _, _, mcp in strategies]
+        )
+    except Exception as e:
+        # Each backtest then fetches its own data and reports its own failure
+        print(f"⚠️ Batched price download failed, fetching per strategy: {e}")
+        prices = {}
+
+    backtests = await asyncio.gather(*(
+        run_backtest(idx, metrics, mcp, prices.get(mcp.symbol), verbose)
+        for idx, prompt, metrics, mcp in strategies
+    ))
+    completed = [
+        (prompt, metrics, mcp, results)
+        for (idx, prompt, metrics, mcp), results in zip(strategies, backtests)
+        if results is not None
+    ]
+    if not completed:
+        return []
+
+    # One Gemini request explains every strategy
+    try:
+        ex_agent = get_explain_agent()
+        explanations = await ex_agent.explain_batch([(mcp, results) for _, _, mcp, results in completed])
+    except Exception as e:
+        for _, metrics, _, _ in completed:
+            metrics.fail(e)
+            metrics.print_summary()
+        print(f"❌ Error explaining strategies: {e}")
+        return []
+
     all_results = []
+    for (prompt, metrics, mcp, results), explanation in zip(completed, explanations):
+        metrics.mark(Stage.EXPLAIN)
+        if verbose: print(f"📝 Explanation generated for {mcp.strategy_name}.")
+        all_results.append(summarize_run(prompt, metrics, mcp, results, explanation))
+    return all_results
+
+
+def main():
     start = time.time()
 
-    for idx, prompt in enumerate(PROMPTS):
-        result = run_single_pipeline(prompt, idx)
-        if result:
-            all_results.append(result)
+    all_results = asyncio.run(run_all_pipelines())
 
     if not all_results:
         print("\n⚠️ No successful strategies to display.")
@@ -100,16 +160,15 @@ def main():
 
     # Explanations
     print("\n🧠 Strategy Explanations:\n")
-    for _, row in df_sorted.iterrows():
-        print(f"🔹 {row['Strategy Name']} ({row['Symbol']}):")
-        print(row["Explanation"].strip() + "\n")
+    for name, symbol, explanation in df_sorted[["Strategy Name", "Symbol", "Explanation"]].itertuples(index=False, name=None):
+        print(f"🔹 {name} ({symbol}):")
+        print(explanation.strip() + "\n")
 
     # Equity Curve Preview
     print("📈 Equity Curve Previews:")
-    for _, row in df_sorted.iterrows():
-        curve = row["Equity Curve"]
+    for name, symbol, curve in df_sorted[["Strategy Name", "Symbol", "Equity Curve"]].itertuples(index=False, name=None):
         preview = f"{curve[:5]}..." if curve else "No data"
-        print(f"  ▸ {row['Strategy Name']} ({row['Symbol']}): {preview}")
+        print(f"  ▸ {name} ({symbol}): {preview}")
 
     print(f"\n⏱️ Total runtime: {round(time.time() - start, 2)}s")
 
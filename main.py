@@ -1,12 +1,13 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List
-from agents.strategy_gen import StrategyGenAgent
+from agents.strategy_gen import get_strategy_gen_agent
 from agents.backtest_agent import BacktestAgent
-from agents.explain_agent import ExplainabilityAgent
+from agents.explain_agent import get_explain_agent
 from mcp.schema import StrategyMCP
-from metrics import StrategyRunMetrics
-from models.run_store import run_store
+from metrics import StrategyRunMetrics, Stage
+from models.run_store import get_run_store
 
 app = FastAPI()
 
@@ -16,20 +17,21 @@ class PromptRequest(BaseModel):
 
 
 @app.post("/run-strategy")
-def run_strategy(req: PromptRequest):
+async def run_strategy(req: PromptRequest):
     metrics = StrategyRunMetrics(prompt=req.prompt)
     try:
-        strat_agent = StrategyGenAgent()
-        metrics.mark("strategy_gen")
-        mcp: StrategyMCP = strat_agent.generate_strategy(req.prompt)
+        strat_agent = get_strategy_gen_agent()
+        metrics.mark(Stage.STRATEGY_GEN)
+        mcp: StrategyMCP = await strat_agent.generate_strategy(req.prompt)
 
         bt_agent = BacktestAgent(mcp)
-        metrics.mark("backtest")
-        results = bt_agent.simulate()
+        metrics.mark(Stage.BACKTEST)
+        # The backtest is CPU-bound, keep it off the event loop
+        results = await run_in_threadpool(bt_agent.simulate)
 
-        ex_agent = ExplainabilityAgent()
-        metrics.mark("explain")
-        explanation = ex_agent.explain(mcp, results)
+        ex_agent = get_explain_agent()
+        metrics.mark(Stage.EXPLAIN)
+        explanation = await ex_agent.explain(mcp, results)
 
         metrics.complete(
             sharpe=results.get("sharpe_ratio", 0),
@@ -37,13 +39,13 @@ def run_strategy(req: PromptRequest):
             avg_return=results.get("average_return", 0)
         )
 
-        run_id = run_store.add({
-            "prompt": req.prompt,
-            "strategy": mcp.dict(),
-            "results": results,
-            "explanation": explanation,
-            "metrics": metrics.results
-        })
+        run_id = get_run_store().add_validated(
+            mcp,
+            prompt=req.prompt,
+            results=results,
+            explanation=explanation,
+            metrics=metrics.results
+        )
 
         return {
             "id": run_id,
@@ -61,12 +63,12 @@ def run_strategy(req: PromptRequest):
 
 @app.get("/strategies")
 def list_strategies():
-    return run_store.all()
+    return get_run_store().all()
 
 
 @app.get("/strategy/{id}")
 def get_strategy(id: int):
-    item = run_store.get(id)
-    if item is None:
+    body = get_run_store().to_json(id)
+    if body is None:
         raise HTTPException(status_code=404, detail="Strategy not found")
-    return item
+    return Response(content=body, media_type="application/json")
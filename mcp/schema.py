@@ -1,44 +1,80 @@
-from typing import List, Dict, Union
-from pydantic import BaseModel
+from functools import lru_cache
+from typing import List, Dict, Tuple, Union
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from pydantic.dataclasses import dataclass
 
-class Indicator(BaseModel):
+
+# Validated strategies are never modified afterwards. Unknown keys are ignored
+# rather than forbidden: the LLM (and StrategyGenAgent's "assets") adds extras.
+_MODEL_CONFIG = ConfigDict(frozen=True, extra="ignore", validate_assignment=False)
+# The dataclass decorator sets frozen itself
+_LEAF_CONFIG = ConfigDict(extra="ignore")
+
+# Leaf blocks are frozen, slotted pydantic dataclasses: lighter than models,
+# but their fields are still type-checked so bad LLM output fails validation.
+
+@dataclass(slots=True, frozen=True, config=_LEAF_CONFIG)
+class Indicator:
     name: str
     parameters: Dict[str, Union[str, float, int]]
     description: str
 
-class CriteriaBlock(BaseModel):
-    conditions: List[str]
+@dataclass(slots=True, frozen=True, config=_LEAF_CONFIG)
+class CriteriaBlock:
+    # Pydantic turns the LLM's list into a tuple and rejects a bare string or non-str items
+    conditions: Tuple[str, ...]
     description: str
 
-class EntryCriteria(BaseModel):
-    long_entry: CriteriaBlock
-    short_entry: CriteriaBlock
-    considerations: str
-
-class StopLoss(BaseModel):
+@dataclass(slots=True, frozen=True, config=_LEAF_CONFIG)
+class StopLoss:
     long_stop_loss: str
     short_stop_loss: str
     description: str
 
-class TakeProfit(BaseModel):
+@dataclass(slots=True, frozen=True, config=_LEAF_CONFIG)
+class TakeProfit:
     long_take_profit: str
     short_take_profit: str
     description: str
 
-class TrailingStop(BaseModel):
+@dataclass(slots=True, frozen=True, config=_LEAF_CONFIG)
+class TrailingStop:
     long_exit: str
     short_exit: str
     description: str
 
+
+class EntryCriteria(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    long_entry: CriteriaBlock
+    short_entry: CriteriaBlock
+    considerations: str
+
 class ExitCriteria(BaseModel):
+    model_config = _MODEL_CONFIG
+
     stop_loss: StopLoss
     take_profit: TakeProfit
     trailing_stop_alternative: TrailingStop
 
 class StrategyMCP(BaseModel):
+    model_config = _MODEL_CONFIG
+
     strategy_name: str
     symbol: str
     indicators: List[Indicator]
     entry_criteria: EntryCriteria
     exit_criteria: ExitCriteria
     timeframe: str
+
+    @classmethod
+    def parse_many(cls, raw_json: Union[str, bytes]) -> List["StrategyMCP"]:
+        """Validate a JSON array of strategies straight from the raw text, in one pydantic-core pass."""
+        return _strategy_list_adapter().validate_json(raw_json)
+
+
+@lru_cache(maxsize=1)
+def _strategy_list_adapter() -> TypeAdapter:
+    # Built on first use; the adapter compiles its own validator for the list type
+    return TypeAdapter(List[StrategyMCP])
@@ -1,49 +1,107 @@
+import io
+import sys
 import time
-from tabulate import tabulate
+from enum import IntEnum
+
+
+class Stage(IntEnum):
+    """Pipeline stages passed to mark(); the values index StrategyRunMetrics.times."""
+    STRATEGY_GEN = 0
+    BACKTEST = 1
+    EXPLAIN = 2
 
 
 class StrategyRunMetrics:
+    __slots__ = ("prompt", "start_time", "end_time", "times", "results", "success", "error", "_cached_table")
+
     def __init__(self, prompt: str):
         self.prompt = prompt
-        self.start_time = time.time()
-        self.times = {}
+        self.start_time = time.perf_counter_ns()
+        self.end_time = None  # set by complete()/fail()
+        self.times = [0] * len(Stage)  # perf_counter_ns() per stage, 0 until marked
         self.results = {}
         self.success = False
-        self.error = None
+        self.error = None  # (exception type name, message) after fail()
+        self._cached_table = None  # (rendered for a TTY, summary text) once the run has finished
 
-    def mark(self, stage: str):
-        self.times[stage] = time.time()
+    def mark(self, stage: Stage):
+        self.times[stage] = time.perf_counter_ns()
 
     def complete(self, sharpe: float, win_rate: float, avg_return: float):
+        # Raw values, so aggregates across runs aren't skewed by rounding; formatted only for display
         self.results = {
-            "Sharpe Ratio": round(sharpe, 3),
-            "Win Rate (%)": round(win_rate, 2),
-            "Avg Return": round(avg_return, 3)
+            "Sharpe Ratio": float(sharpe),
+            "Win Rate (%)": float(win_rate),
+            "Avg Return": float(avg_return)
         }
         self.success = True
+        self.end_time = time.perf_counter_ns()
+        self._cached_table = None
+
+    def elapsed(self) -> float:
+        """Seconds from the start of the run until it finished, or until now if it is still running."""
+        end = self.end_time if self.end_time is not None else time.perf_counter_ns()
+        return (end - self.start_time) / 1e9
 
     def fail(self, error: Exception):
-        self.error = str(error)
+        self.error = (type(error).__name__, str(error))
         self.success = False
+        self.end_time = time.perf_counter_ns()
+        self._cached_table = None
 
     def print_summary(self):
-        print("\n🧪 Performance Summary:")
-        data = [
-            ["Prompt", self.prompt],
-            ["Status", "✅ Success" if self.success else "❌ Failure"],
-            ["Total Runtime (s)", round(time.time() - self.start_time, 2)]
-        ]
+        tty = sys.stdout.isatty()
+        # A finished run's summary never changes, so repeated prints reuse the rendered text
+        if self._cached_table is not None and self._cached_table[0] == tty:
+            text = self._cached_table[1]
+        else:
+            text = self._render_summary(tty)
+            if self.end_time is not None:
+                self._cached_table = (tty, text)
+
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def _render_summary(self, tty: bool) -> str:
+        status = "✅ Success" if self.success else "❌ Failure"
+        runtime = round(self.elapsed(), 2)
 
         if self.success:
-            data += [
-                ["Time to Strategy Gen (s)", round(self.times.get("strategy_gen", 0) - self.start_time, 2)],
-                ["Time to Backtest (s)", round(self.times.get("backtest", 0) - self.times.get("strategy_gen", 0), 2)],
-                ["Time to Explain (s)", round(self.times.get("explain", 0) - self.times.get("backtest", 0), 2)],
-                ["Sharpe Ratio", self.results["Sharpe Ratio"]],
-                ["Win Rate (%)", self.results["Win Rate (%)"]],
-                ["Avg Return", self.results["Avg Return"]],
+            data = [
+                ["Prompt", self.prompt],
+                ["Status", status],
+                ["Total Runtime (s)", runtime],
+                ["Time to Strategy Gen (s)", round((self.times[Stage.STRATEGY_GEN] - self.start_time) / 1e9, 2)],
+                ["Time to Backtest (s)", round((self.times[Stage.BACKTEST] - self.times[Stage.STRATEGY_GEN]) / 1e9, 2)],
+                ["Time to Explain (s)", round((self.times[Stage.EXPLAIN] - self.times[Stage.BACKTEST]) / 1e9, 2)],
+                ["Sharpe Ratio", f"{self.results['Sharpe Ratio']:.3f}"],
+                ["Win Rate (%)", f"{self.results['Win Rate (%)']:.2f}"],
+                ["Avg Return", f"{self.results['Avg Return']:.3f}"],
             ]
         else:
-            data.append(["Error", self.error])
+            data = [
+                ["Prompt", self.prompt],
+                ["Status", status],
+                ["Total Runtime (s)", runtime],
+                ["Error", self._format_error()],
+            ]
+
+        # Build the whole summary first so it goes out in a single write
+        buf = io.StringIO()
+        buf.write("\n🧪 Performance Summary:\n")
+        if tty:
+            # Imported lazily: processes that never print a summary don't pay for it
+            from tabulate import tabulate
+            buf.write(tabulate(data, headers=["Metric", "Value"], tablefmt="fancy_grid"))
+        else:
+            # Piped or redirected output doesn't need a box-drawn table
+            buf.write("\n".join(f"{metric}\t{value}" for metric, value in data))
+        buf.write("\n")
+        return buf.getvalue()
 
-        print(tabulate(data, headers=["Metric", "Value"], tablefmt="fancy_grid"))
+    def _format_error(self) -> str:
+        # Built from the stored record: keeping the exception would keep its traceback's frames alive
+        if self.error is None:
+            return ""
+        name, message = self.error
+        return f"{name}: {message}" if message else name
@@ -1,19 +1,209 @@
+import itertools
+import threading
+from array import array
+from dataclasses import is_dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union, get_args, get_origin
+import numpy as np
+import orjson
+from pydantic import BaseModel
+from mcp.schema import StrategyMCP
+
+_NAN = float("nan")
+
+
+def _as_record(data: Union[dict, StrategyMCP]) -> Tuple[dict, bool]:
+    """The run dict to store for `data`, and whether its strategy is already validated."""
+    # Dump models once at ingress so reads never go back through pydantic serialization
+    if isinstance(data, StrategyMCP):
+        return {"strategy": data.model_dump(mode="json")}, True
+    if isinstance(data, BaseModel):
+        # Its dump wouldn't have the "strategy" key get_model() reads
+        raise TypeError(f"Expected a run dict or StrategyMCP, got {type(data).__name__}")
+    return data, False
+
+
+def _metric(results, key: str) -> float:
+    # Runs come from anywhere, so anything that isn't a number becomes NaN rather than an error
+    try:
+        return float(results.get(key, _NAN))
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def _column_values(data: dict) -> tuple:
+    results = data.get("results")
+    if not isinstance(results, dict):
+        results = {}
+    return (
+        _metric(results, "sharpe_ratio"),
+        _metric(results, "win_rate"),
+        _metric(results, "average_return"),
+    )
+
+
+def _construct(model_cls, data: dict):
+    # model_construct() skips validation but doesn't recurse, so build nested models ourselves
+    values = {
+        name: _construct_value(field.annotation, data[name])
+        for name, field in model_cls.model_fields.items()
+        if name in data
+    }
+    return model_cls.model_construct(**values)
+
+
+def _construct_value(annotation, value):
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _construct(annotation, value)
+    if is_dataclass(annotation):
+        return annotation(**value)
+    if get_origin(annotation) in (list, List):
+        (item_type,) = get_args(annotation)
+        return [_construct_value(item_type, item) for item in value]
+    return value
+
+
 class StrategyRunStore:
     def __init__(self):
-        self._runs = []
-        self._counter = 0
+        self._runs = []  # insertion order, for all()
+        self._by_id = {}
+        self._next_id = itertools.count(1)
+        # Guards the id counter and the containers below, so ids follow insertion
+        # order and a run is added to all of them together
+        self._lock = threading.Lock()
+        self._trusted = set()  # ids whose strategy was validated before it was stored
+        # Runs are never modified once added, so rebuilt models can be cached by id
+        self._model_cache = lru_cache(maxsize=256)(self._build_model)
+        # Column copies of the fields summary views scan, in insertion order.
+        # Missing or non-numeric metrics are NaN; the accessors return copies.
+        self._ids = []
+        self._prompts = []
+        self._sharpes = array("d")
+        self._win_rates = array("d")
+        self._avg_returns = array("d")
 
-    def add(self, data: dict) -> int:
-        self._counter += 1
-        data["id"] = self._counter
-        self._runs.append(data)
-        return self._counter
+    def add(self, data: Union[dict, StrategyMCP]) -> int:
+        return self._insert(*_as_record(data))
+
+    def add_many(self, items: List[Union[dict, StrategyMCP]]) -> List[int]:
+        records = [_as_record(data) for data in items]
+        items = [data for data, _ in records]
+        # Everything that can fail happens before the store is touched
+        rows = [_column_values(data) for data in items]
+        # Grow the run list with a single extend
+        with self._lock:
+            for (data, trusted), row in zip(records, rows):
+                data["id"] = next(self._next_id)
+                self._by_id[data["id"]] = data
+                self._append_columns(data, row)
+                if trusted:
+                    self._trusted.add(data["id"])
+            self._runs.extend(items)
+        return [data["id"] for data in items]
+
+    def add_validated(self, strategy: StrategyMCP, **fields) -> int:
+        return self._insert({"strategy": strategy.model_dump(mode="json"), **fields}, trusted=True)
+
+    def _insert(self, data: dict, trusted: bool = False) -> int:
+        row = _column_values(data)
+        with self._lock:
+            run_id = next(self._next_id)
+            data["id"] = run_id
+            self._runs.append(data)
+            self._by_id[run_id] = data
+            self._append_columns(data, row)
+            if trusted:
+                self._trusted.add(run_id)
+        return run_id
 
     def all(self):
         return self._runs
 
+    # Copies, so callers can't grow or pin the columns (a buffer export would block appends)
+    def ids(self) -> List[int]:
+        with self._lock:
+            return list(self._ids)
+
+    def prompts(self) -> List[str]:
+        with self._lock:
+            return list(self._prompts)
+
+    def sharpes(self) -> array:
+        with self._lock:
+            return array("d", self._sharpes)
+
+    def win_rates(self) -> array:
+        with self._lock:
+            return array("d", self._win_rates)
+
+    def avg_returns(self) -> array:
+        with self._lock:
+            return array("d", self._avg_returns)
+
+    # NumPy copies of the metric columns for vectorized aggregation. These are copies rather
+    # than frombuffer() views: an array('d') can't grow while a view exports its buffer.
+    def sharpes_array(self) -> np.ndarray:
+        return self._column_array(self._sharpes)
+
+    def win_rates_array(self) -> np.ndarray:
+        return self._column_array(self._win_rates)
+
+    def returns_array(self) -> np.ndarray:
+        return self._column_array(self._avg_returns)
+
     def get(self, run_id: int):
-        return next((r for r in self._runs if r["id"] == run_id), None)
+        return self._by_id.get(run_id)
+
+    def to_json(self, run_id: int) -> Optional[bytes]:
+        run = self._by_id.get(run_id)
+        if run is None:
+            return None
+        # Backtest metrics are numpy scalars, which orjson only encodes with this option
+        return orjson.dumps(run, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def get_model(self, run_id: int) -> Optional[StrategyMCP]:
+        # Checked here so unknown ids are never cached as None
+        if run_id not in self._by_id:
+            return None
+        return self._model_cache(run_id)
+
+    def _append_columns(self, data: dict, row: tuple):
+        sharpe, win_rate, avg_return = row
+        self._ids.append(data["id"])
+        self._prompts.append(data.get("prompt"))
+        self._sharpes.append(sharpe)
+        self._win_rates.append(win_rate)
+        self._avg_returns.append(avg_return)
+
+    def _column_array(self, column: array) -> np.ndarray:
+        # The copy reads the column's buffer, which would make a concurrent append fail
+        with self._lock:
+            return np.array(column, dtype=np.float64)
+
+    def _build_model(self, run_id: int) -> StrategyMCP:
+        run = self._by_id[run_id]
+        if run_id in self._trusted:
+            return _construct(StrategyMCP, run["strategy"])
+        return StrategyMCP.model_validate(run["strategy"])
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_run_store() -> StrategyRunStore:
+    """Process-wide store, created on first use."""
+    global _store
+    # lru_cache wouldn't do here: it doesn't stop concurrent first calls from each building a store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = StrategyRunStore()
+    return _store
 
 
-run_store = StrategyRunStore()
+def __getattr__(name: str):
+    # `from models.run_store import run_store` keeps working without creating the store at import
+    if name == "run_store":
+        return get_run_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
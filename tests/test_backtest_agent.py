@@ -0,0 +1,15 @@
+import numpy as np
+import pandas as pd
+from agents.backtest_agent import BacktestAgent
+
+
+def test_rsi_is_nan_for_flat_prices():
+    rsi = BacktestAgent.compute_rsi(pd.Series(np.full(40, 100.0)))
+    assert rsi.isna().all()
+
+
+def test_rsi_is_100_when_prices_only_rise():
+    rsi = BacktestAgent.compute_rsi(pd.Series(np.arange(40, dtype=np.float64)))
+    assert rsi.iloc[:14].isna().all()
+    assert (rsi.iloc[14:] == 100.0).all()
+
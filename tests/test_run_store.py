@@ -0,0 +1,51 @@
+import pytest
+from pydantic import BaseModel
+from mcp.schema import StrategyMCP
+from models.run_store import StrategyRunStore
+
+
+def _leaf(**fields):
+    return {**fields, "description": "d"}
+
+
+STRATEGY = {
+    "strategy_name": "Mean Reversion",
+    "symbol": "AAPL",
+    "indicators": [_leaf(name="RSI", parameters={"period": 14})],
+    "entry_criteria": {
+        "long_entry": _leaf(conditions=["rsi < 30"]),
+        "short_entry": _leaf(conditions=["rsi > 70"]),
+        "considerations": "c",
+    },
+    "exit_criteria": {
+        "stop_loss": _leaf(long_stop_loss="2%", short_stop_loss="2%"),
+        "take_profit": _leaf(long_take_profit="4%", short_take_profit="4%"),
+        "trailing_stop_alternative": _leaf(long_exit="x", short_exit="y"),
+    },
+    "timeframe": "1d",
+}
+
+
+def test_add_model_then_get_model():
+    store = StrategyRunStore()
+    model = StrategyMCP(**STRATEGY)
+    run_id = store.add(model)
+    assert store.get(run_id)["strategy"]["symbol"] == "AAPL"
+    assert store.get_model(run_id) == model
+
+
+def test_add_many_models_then_get_model():
+    store = StrategyRunStore()
+    model = StrategyMCP(**STRATEGY)
+    ids = store.add_many([model, {"strategy": STRATEGY, "prompt": "p"}])
+    assert [store.get_model(run_id) for run_id in ids] == [model, model]
+
+
+def test_add_rejects_other_models():
+    class Other(BaseModel):
+        name: str
+
+    store = StrategyRunStore()
+    with pytest.raises(TypeError):
+        store.add(Other(name="x"))
+    assert store.all() == []